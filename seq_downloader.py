@@ -9,13 +9,11 @@ SRA Toolkit installation and management.
 
 import sys
 import os
-import argparse
 from pathlib import Path
 
 # Add the current directory to Python path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.main_controller import MainController
 from src.config import APP_NAME, APP_VERSION, APP_DESCRIPTION
 
 
@@ -34,6 +32,7 @@ OPTIONS:
     --examples          Show usage examples
     --formats           Show supported file formats
     --troubleshoot      Show troubleshooting guide
+    --refresh-cache     Ignore cached GSE lookups and query NCBI again
 
 INTERACTIVE MODE:
     When run without arguments, the tool starts in interactive mode and guides
@@ -388,65 +387,38 @@ CONTACT AND RESOURCES:
 
 def show_version():
     """Display version information."""
-    version_text = f"""
-{APP_NAME} v{APP_VERSION}
-
-{APP_DESCRIPTION}
-
-Python version: {sys.version}
-Platform: {sys.platform}
-
-For help: python seq_downloader.py --help
-For examples: python seq_downloader.py --examples
-"""
-    print(version_text)
+    # Kept to a single line so scripted version checks stay cheap
+    print(f"{APP_NAME} v{APP_VERSION}")
 
 
-def parse_arguments():
-    """Parse command line arguments."""
-    parser = argparse.ArgumentParser(
-        description=APP_DESCRIPTION,
-        add_help=False  # We'll handle help ourselves
-    )
-    
-    parser.add_argument('-h', '--help', action='store_true',
-                       help='Show help message and exit')
-    parser.add_argument('--version', action='store_true',
-                       help='Show version information')
-    parser.add_argument('--examples', action='store_true',
-                       help='Show usage examples')
-    parser.add_argument('--formats', action='store_true',
-                       help='Show supported file formats')
-    parser.add_argument('--troubleshoot', action='store_true',
-                       help='Show troubleshooting guide')
-    
-    return parser.parse_args()
+# Command line options are mutually exclusive flags, so a lookup table
+# replaces argparse and keeps its imports off the startup path
+_DISPATCH = {
+    '-h': show_help,
+    '--help': show_help,
+    '--version': show_version,
+    '--examples': show_examples,
+    '--formats': show_formats,
+    '--troubleshoot': show_troubleshooting,
+}
 
 
 def main():
     """Main entry point for the RNA-seq downloader."""
+    if len(sys.argv) == 2 and sys.argv[1] in _DISPATCH:
+        _DISPATCH[sys.argv[1]]()
+        return 0
+    
+    refresh_cache = sys.argv[1:] == ['--refresh-cache']
+    if len(sys.argv) > 1 and not refresh_cache:
+        print(f"Unknown option: {' '.join(sys.argv[1:])}")
+        print("For usage information, run: python seq_downloader.py --help")
+        return 2
+    
     try:
-        args = parse_arguments()
-        
-        # Handle command line options
-        if args.help:
-            show_help()
-            return 0
-        elif args.version:
-            show_version()
-            return 0
-        elif args.examples:
-            show_examples()
-            return 0
-        elif args.formats:
-            show_formats()
-            return 0
-        elif args.troubleshoot:
-            show_troubleshooting()
-            return 0
-        
-        # Run interactive mode
-        controller = MainController()
+        # Run interactive mode (imported here so help-only paths stay light)
+        from src.main_controller import MainController
+        controller = MainController(refresh_cache=refresh_cache)
         exit_code = controller.run()
         sys.exit(exit_code)
         
@@ -461,4 +433,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
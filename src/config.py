@@ -9,15 +9,45 @@ DEFAULT_OUTPUT_DIR = "downloads"
 DEFAULT_LOG_DIR = "logs"
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 5
+MAX_RETRY_DELAY = 60  # Upper bound for exponential retry backoff
 DEFAULT_TIMEOUT = 300
+SRA_MANIFEST_FILE = "sra_manifest.json"  # Stored under <output_dir>/.cache/
+DEFAULT_THREADS = 4  # Used when no measured default is available
+MAX_THREADS = 16
+
+# Persistent cache configuration
+CACHE_DIR = "~/.cache/seq_downloader"
+GSE_CACHE_FILE = "gse_cache.json"
+GSE_CACHE_TTL = 24 * 60 * 60  # Seconds before a cached GSE lookup is refreshed
+PERF_HINT_FILE = "perf_hint.json"
+PERF_HINT_TTL = 7 * 24 * 60 * 60  # Seconds before the bandwidth probe is run again
+PERF_HINT_FAILED_TTL = 60 * 60  # Shorter retry window when the probe failed
+
+# Bandwidth probe used to pick the default number of parallel downloads
+BANDWIDTH_PROBE_URL = "https://ftp.ncbi.nlm.nih.gov/gene/DATA/gene_info.gz"
+BANDWIDTH_PROBE_SECONDS = 2
+BANDWIDTH_PROBE_TIMEOUT = 3  # Socket timeout for the single, unretried probe request
+MBPS_PER_DOWNLOAD = 20  # Rule-of-thumb bandwidth one download stream can use
 
 # SRA toolkit configuration
 SRATOOLKIT_PATH = "tools/sratoolkit"
 PREFETCH_EXECUTABLE = "prefetch"
 FASTERQ_DUMP_EXECUTABLE = "fasterq-dump"
+VDB_DUMP_EXECUTABLE = "vdb-dump"
+FASTERQ_DUMP_MEMORY = "1G"  # Memory limit per fasterq-dump job (--mem)
+
+# Size-aware scheduling: runs above the threshold share a small number of
+# download slots so they do not starve each other of bandwidth
+LARGE_SRA_THRESHOLD = 5 * 1024 ** 3  # bytes
+LARGE_SRA_MAX_CONCURRENT = 2
+SIZE_QUERY_TIMEOUT = 60
 
 # NCBI API configuration
 NCBI_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
 NCBI_ESEARCH_URL = f"{NCBI_BASE_URL}/esearch.fcgi"
 NCBI_ELINK_URL = f"{NCBI_BASE_URL}/elink.fcgi"
-NCBI_REQUEST_DELAY = 0.34  # NCBI recommends no more than 3 requests per second
\ No newline at end of file
+NCBI_ESUMMARY_URL = f"{NCBI_BASE_URL}/esummary.fcgi"
+NCBI_REQUEST_DELAY = 0.34  # NCBI recommends no more than 3 requests per second
+NCBI_MAX_CONCURRENT_REQUESTS = 3
+NCBI_MAX_RETRIES = 3
+NCBI_ESUMMARY_BATCH_SIZE = 200  # SRA IDs per esummary request
\ No newline at end of file
@@ -1,32 +1,125 @@
 """GSE Fetcher module for retrieving SRA IDs from GSE numbers."""
 
-import requests
-import xml.etree.ElementTree as ET
+import io
+import json
+import atexit
+import re
 import time
 import logging
-from typing import List, Optional
-from urllib.parse import urlencode
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
-from .config import NCBI_ESEARCH_URL, NCBI_ELINK_URL, NCBI_REQUEST_DELAY
+from .config import (
+    NCBI_ESEARCH_URL, NCBI_ELINK_URL, NCBI_ESUMMARY_URL, NCBI_REQUEST_DELAY,
+    NCBI_ESUMMARY_BATCH_SIZE, NCBI_MAX_CONCURRENT_REQUESTS, NCBI_MAX_RETRIES,
+    CACHE_DIR, GSE_CACHE_FILE, GSE_CACHE_TTL, APP_VERSION
+)
+
+if TYPE_CHECKING:
+    import requests
+
+# Pattern for SRR run accessions embedded in esummary Run items
+_SRR_RE = re.compile(r'SRR\d+')
+
+_log = logging.getLogger(__name__)
+
+_CACHE_PATH = Path(CACHE_DIR).expanduser() / GSE_CACHE_FILE
+
+# In-process memo of GSE lookups made during this session
+_memory_cache: Dict[str, List[str]] = {}
+
+
+def _load_cache() -> Dict[str, Any]:
+    """Load the on-disk GSE lookup cache, returning an empty cache on any error."""
+    try:
+        return json.loads(_CACHE_PATH.read_text())
+    except Exception:
+        return {}
+
+
+def _save_cache(cache: Dict[str, Any]):
+    """Write the GSE lookup cache to disk atomically."""
+    try:
+        _CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _CACHE_PATH.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(cache))
+        tmp_path.replace(_CACHE_PATH)
+    except OSError as e:
+        _log.debug(f"Could not write GSE cache {_CACHE_PATH}: {e}")
+
+
+def create_session() -> 'requests.Session':
+    """
+    Create an HTTP session configured for NCBI E-utilities.
+    
+    Keep-alive connections to NCBI are pooled and reused across esearch,
+    elink and esummary calls; transient failures are retried with backoff.
+    
+    Returns:
+        A configured requests Session
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': f'seq_downloader/{APP_VERSION} (https://github.com/Gardiner-Lab/seq_Geo_Dowloader)'
+    })
+    
+    retries = Retry(total=NCBI_MAX_RETRIES, backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount('https://', adapter)
+    return session
 
 
 class GSEFetcher:
     """Class for fetching SRA IDs from GSE numbers using NCBI APIs."""
     
-    def __init__(self):
-        """Initialize the GSEFetcher."""
-        self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'seq_downloader/2.0.0 (https://github.com/Gardiner-Lab/seq_Geo_Dowloader)'
-        })
+    # Time of the most recent NCBI request, shared by all fetchers so the
+    # rate limit holds across instances and worker threads
+    _last_req = 0.0
+    _req_lock = threading.Lock()
+    
+    def __init__(self, session: Optional['requests.Session'] = None):
+        """
+        Initialize the GSEFetcher.
+        
+        Args:
+            session: Shared HTTP session (see create_session); one is
+                created on first use if not given
+        """
+        self.logger = _log
+        # Without an injected session, it is created on first use so that
+        # importing or constructing the fetcher does not pull in the network stack
+        self.session = session
+    
+    def _get_session(self) -> 'requests.Session':
+        """
+        Get the HTTP session, creating it on first use.
+        
+        Returns:
+            The requests Session used for all NCBI calls
+        """
+        if self.session is None:
+            self.session = create_session()
+            atexit.register(self.session.close)
+        return self.session
     
-    def fetch_sra_ids(self, gse_number: str) -> List[str]:
+    def fetch_sra_ids(self, gse_number: str, refresh: bool = False) -> List[str]:
         """
         Fetch SRA IDs associated with a GSE number.
         
+        This is a batch lookup of one GSE number (see fetch_sra_ids_batch).
+        Results are memoized in-process and cached on disk for GSE_CACHE_TTL
+        seconds; cache entries written by another version are ignored.
+        
         Args:
             gse_number: The GSE number (e.g., 'GSE123456')
+            refresh: Bypass cached results and query NCBI again
             
         Returns:
             List of SRA IDs found for the GSE number
@@ -34,129 +127,288 @@ class GSEFetcher:
         Raises:
             Exception: If there's an error fetching the data
         """
+        return self.fetch_sra_ids_batch([gse_number], refresh=refresh)[gse_number.upper()]
+    
+    def fetch_sra_ids_batch(self, gse_numbers: List[str],
+                            refresh: bool = False) -> Dict[str, List[str]]:
+        """
+        Fetch SRA IDs for several GSE numbers with a shared set of NCBI requests.
+        
+        All uncached GSE numbers are resolved by one esearch, one GEO
+        esummary and one elink request, followed by batched SRA esummary
+        requests, instead of a full round of requests per GSE number.
+        Results are only cached when every request succeeded, so a failed
+        batch never leaves a partial list of runs in the cache.
+        
+        Args:
+            gse_numbers: GSE numbers to look up (e.g., ['GSE123456', 'GSE98765'])
+            refresh: Bypass cached results and query NCBI again
+            
+        Returns:
+            Dictionary mapping each upper-cased GSE number to its SRA IDs,
+            in input order
+            
+        Raises:
+            Exception: If there's an error fetching the data
+        """
+        keys = list(dict.fromkeys(gse_number.upper() for gse_number in gse_numbers))
+        cache = _load_cache()
+        results = {}
+        for key in keys:
+            cached_ids = None if refresh else self._get_cached(cache, key)
+            if cached_ids is not None:
+                results[key] = cached_ids
+        
+        pending = [key for key in keys if key not in results]
+        if not pending:
+            return {key: results[key] for key in keys}
+        
         try:
-            # Step 1: Search for the GSE in GEO database
-            geo_ids = self._search_geo_database(gse_number)
-            if not geo_ids:
-                self.logger.warning(f"No GEO IDs found for {gse_number}")
-                return []
+            # Step 1: Search for all GSE numbers in the GEO database at once
+            geo_ids = self._search_geo_database(pending)
             
-            # Step 2: Link GEO IDs to SRA database
-            sra_ids = self._link_geo_to_sra(geo_ids)
-            if not sra_ids:
-                self.logger.warning(f"No SRA IDs found for {gse_number}")
-                return []
+            # Step 2: Map GEO IDs back to their GSE accessions
+            geo_to_gse = self._map_geo_accessions(geo_ids)
+            
+            # Step 3: Link each GEO ID to its SRA IDs and resolve run accessions
+            links = self._link_geo_ids(list(geo_to_gse))
+            all_sra_ids = list(dict.fromkeys(sra_id for ids in links.values() for sra_id in ids))
+            run_accessions = self._fetch_run_accessions(all_sra_ids)
             
-            self.logger.info(f"Found {len(sra_ids)} SRA IDs for {gse_number}")
-            return sra_ids
+            accessions_by_gse = {key: {} for key in pending}
+            for geo_id, gse in geo_to_gse.items():
+                if gse not in accessions_by_gse:
+                    continue
+                for sra_id in links.get(geo_id, []):
+                    for srr_id in run_accessions.get(sra_id, []):
+                        accessions_by_gse[gse][srr_id] = None
+            
+            for key in pending:
+                sra_ids = list(accessions_by_gse[key])
+                results[key] = sra_ids
+                if sra_ids:
+                    self.logger.info(f"Found {len(sra_ids)} SRA IDs for {key}")
+                    self._store_cached(cache, key, sra_ids)
+                else:
+                    self.logger.warning(f"No SRA IDs found for {key}")
+            _save_cache(cache)
+            
+            return {key: results[key] for key in keys}
             
         except Exception as e:
-            self.logger.error(f"Error fetching SRA IDs for {gse_number}: {e}")
-            raise Exception(f"Failed to fetch SRA IDs for {gse_number}: {str(e)}")
+            self.logger.error(f"Error fetching SRA IDs for {', '.join(pending)}: {e}")
+            raise Exception(f"Failed to fetch SRA IDs for {', '.join(pending)}: {str(e)}")
+    
+    def _get_cached(self, cache: Dict[str, Any], cache_key: str) -> Optional[List[str]]:
+        """
+        Look up a GSE number in the in-process and on-disk caches.
+        
+        Args:
+            cache: Contents of the on-disk cache
+            cache_key: Upper-cased GSE number
+            
+        Returns:
+            Cached SRA IDs, or None if there is no fresh entry
+        """
+        if cache_key in _memory_cache:
+            return list(_memory_cache[cache_key])
+        
+        entry = cache.get(cache_key)
+        if (entry and entry.get('version') == APP_VERSION
+                and time.time() - entry.get('ts', 0) < GSE_CACHE_TTL):
+            self.logger.info(f"Using cached SRA IDs for {cache_key}")
+            _memory_cache[cache_key] = list(entry['ids'])
+            return list(entry['ids'])
+        
+        return None
+    
+    def _store_cached(self, cache: Dict[str, Any], cache_key: str, sra_ids: List[str]):
+        """
+        Record a GSE lookup in the in-process cache and the on-disk cache contents.
+        
+        Args:
+            cache: Contents of the on-disk cache, updated in place
+            cache_key: Upper-cased GSE number
+            sra_ids: SRA IDs found for the GSE number
+        """
+        _memory_cache[cache_key] = list(sra_ids)
+        cache[cache_key] = {'ids': sra_ids, 'ts': time.time(), 'version': APP_VERSION}
     
-    def _search_geo_database(self, gse_number: str) -> List[str]:
+    def _search_geo_database(self, gse_numbers: Union[str, List[str]]) -> List[str]:
         """
-        Search for GSE number in GEO database.
+        Search for one or more GSE numbers in GEO database.
         
         Args:
-            gse_number: The GSE number to search for
+            gse_numbers: The GSE number, or list of GSE numbers, to search for
             
         Returns:
             List of GEO database IDs
         """
+        import xml.etree.ElementTree as ET
+        
+        if isinstance(gse_numbers, str):
+            gse_numbers = [gse_numbers]
+        
         params = {
             'db': 'gds',
-            'term': f'{gse_number}[Accession]',
+            'term': ' OR '.join(f'{gse_number}[Accession]' for gse_number in gse_numbers),
             'retmode': 'xml',
             'retmax': 1000
         }
         
-        url = f"{NCBI_ESEARCH_URL}?{urlencode(params)}"
-        self.logger.debug(f"Searching GEO database: {url}")
+        self.logger.debug(f"Searching GEO database: {params}")
         
-        response = self._make_request(url)
-        if not response:
-            return []
+        response = self._make_request(NCBI_ESEARCH_URL, params=params)
         
-        # Parse XML response
+        # Stream the XML response rather than building the full tree
         try:
-            root = ET.fromstring(response.text)
-            id_list = root.find('.//IdList')
-            if id_list is None:
+            geo_ids = None
+            for _, elem in ET.iterparse(io.BytesIO(response.content), events=('end',)):
+                if elem.tag == 'IdList':
+                    geo_ids = [id_elem.text for id_elem in elem.findall('Id')]
+                    break
+            
+            if geo_ids is None:
                 return []
             
-            geo_ids = [id_elem.text for id_elem in id_list.findall('Id')]
             self.logger.debug(f"Found {len(geo_ids)} GEO IDs")
             return geo_ids
             
         except ET.ParseError as e:
             self.logger.error(f"Error parsing GEO search response: {e}")
-            return []
+            raise
     
-    def _link_geo_to_sra(self, geo_ids: List[str]) -> List[str]:
+    def _map_geo_accessions(self, geo_ids: List[str]) -> Dict[str, str]:
         """
-        Link GEO IDs to SRA database to get SRA IDs.
+        Map GEO database IDs to their accessions (e.g., GSE123456) via esummary.
         
         Args:
             geo_ids: List of GEO database IDs
             
         Returns:
-            List of SRA IDs
+            Dictionary mapping GEO database ID to upper-cased accession
         """
+        import xml.etree.ElementTree as ET
+        
         if not geo_ids:
-            return []
+            return {}
         
+        params = {
+            'db': 'gds',
+            'id': ','.join(geo_ids),
+            'retmode': 'xml'
+        }
+        
+        self.logger.debug(f"Mapping GEO IDs to accessions: {params}")
+        
+        response = self._make_request(NCBI_ESUMMARY_URL, params=params)
+        
+        try:
+            geo_to_gse = {}
+            for _, doc_sum in ET.iterparse(io.BytesIO(response.content), events=('end',)):
+                if doc_sum.tag != 'DocSum':
+                    continue
+                geo_id = doc_sum.findtext('Id')
+                for item in doc_sum.iter('Item'):
+                    if item.get('Name') == 'Accession' and item.text:
+                        geo_to_gse[geo_id] = item.text.upper()
+                        break
+                doc_sum.clear()
+            
+            return geo_to_gse
+            
+        except ET.ParseError as e:
+            self.logger.error(f"Error parsing GEO summary response: {e}")
+            raise
+    
+    def _link_geo_ids(self, geo_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Link each GEO ID to its SRA IDs, keeping the links separate per GEO ID.
+        
+        Args:
+            geo_ids: List of GEO database IDs
+            
+        Returns:
+            Dictionary mapping GEO database ID to numeric SRA IDs
+        """
+        import xml.etree.ElementTree as ET
+        
+        if not geo_ids:
+            return {}
+        
+        # Repeating the id parameter makes elink return one LinkSet per GEO ID
         params = {
             'dbfrom': 'gds',
             'db': 'sra',
-            'id': ','.join(geo_ids),
+            'id': geo_ids,
             'retmode': 'xml'
         }
         
-        url = f"{NCBI_ELINK_URL}?{urlencode(params)}"
-        self.logger.debug(f"Linking GEO to SRA: {url}")
+        self.logger.debug(f"Linking GEO to SRA: {params}")
         
-        response = self._make_request(url)
-        if not response:
-            return []
+        response = self._make_request(NCBI_ELINK_URL, params=params)
         
-        # Parse XML response
         try:
-            root = ET.fromstring(response.text)
-            sra_ids = []
-            
-            # Find all linked SRA IDs
-            for linkset in root.findall('.//LinkSet'):
-                link_set_db = linkset.find('.//LinkSetDb')
-                if link_set_db is not None:
-                    db_to = link_set_db.find('DbTo')
-                    if db_to is not None and db_to.text == 'sra':
-                        id_list = link_set_db.find('IdList')
-                        if id_list is not None:
-                            for id_elem in id_list.findall('Id'):
-                                sra_ids.append(id_elem.text)
-            
-            # Convert numeric SRA IDs to SRR format if needed
-            sra_accessions = self._convert_to_sra_accessions(sra_ids)
-            self.logger.debug(f"Found {len(sra_accessions)} SRA accessions")
-            return sra_accessions
+            links = {}
+            for _, link_set in ET.iterparse(io.BytesIO(response.content), events=('end',)):
+                if link_set.tag != 'LinkSet':
+                    continue
+                geo_id = link_set.findtext('./IdList/Id')
+                for link_set_db in link_set.findall('LinkSetDb'):
+                    if link_set_db.findtext('DbTo') == 'sra':
+                        links.setdefault(geo_id, []).extend(
+                            id_elem.text for id_elem in link_set_db.findall('./Link/Id')
+                        )
+                link_set.clear()
+            
+            return links
             
         except ET.ParseError as e:
             self.logger.error(f"Error parsing SRA link response: {e}")
-            return []
+            raise
     
-    def _convert_to_sra_accessions(self, sra_ids: List[str]) -> List[str]:
+    def _fetch_run_accessions(self, sra_ids: List[str]) -> Dict[str, List[str]]:
         """
-        Convert numeric SRA IDs to SRA accession format (SRR, SRX, etc.).
+        Fetch the run accessions of numeric SRA IDs.
+        
+        Large ID lists are split into batches that are summarised
+        concurrently; the shared rate limiter keeps the request rate
+        within NCBI's guidelines.
         
         Args:
             sra_ids: List of numeric SRA IDs
             
         Returns:
-            List of SRA accessions
+            Dictionary mapping numeric SRA ID to its SRR accessions
         """
         if not sra_ids:
-            return []
+            return {}
+        
+        batches = [sra_ids[i:i + NCBI_ESUMMARY_BATCH_SIZE]
+                   for i in range(0, len(sra_ids), NCBI_ESUMMARY_BATCH_SIZE)]
+        
+        if len(batches) == 1:
+            batch_results = [self._summarize_sra_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=NCBI_MAX_CONCURRENT_REQUESTS) as executor:
+                batch_results = list(executor.map(self._summarize_sra_batch, batches))
+        
+        run_accessions = {}
+        for batch_accessions in batch_results:
+            run_accessions.update(batch_accessions)
+        return run_accessions
+    
+    def _summarize_sra_batch(self, sra_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Fetch run accessions for one batch of numeric SRA IDs via esummary.
+        
+        Args:
+            sra_ids: Batch of numeric SRA IDs
+            
+        Returns:
+            Dictionary mapping numeric SRA ID to its SRR accessions
+        """
+        import xml.etree.ElementTree as ET
         
         # Use esummary to get accession numbers
         params = {
@@ -165,66 +417,66 @@ class GSEFetcher:
             'retmode': 'xml'
         }
         
-        url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi?{urlencode(params)}"
-        self.logger.debug(f"Converting SRA IDs to accessions: {url}")
+        self.logger.debug(f"Converting SRA IDs to accessions: {params}")
         
-        response = self._make_request(url)
-        if not response:
-            return []
+        response = self._make_request(NCBI_ESUMMARY_URL, params=params)
         
         try:
-            root = ET.fromstring(response.text)
-            accessions = []
-            
-            for doc_sum in root.findall('.//DocSum'):
-                # Look for Run accession in the summary
-                for item in doc_sum.findall('.//Item'):
-                    if item.get('Name') == 'Run':
-                        run_text = item.text
-                        if run_text and run_text.startswith('SRR'):
-                            # Extract SRR IDs from the run text
-                            import re
-                            srr_matches = re.findall(r'SRR\d+', run_text)
-                            accessions.extend(srr_matches)
-            
-            # Remove duplicates and return
-            unique_accessions = list(set(accessions))
-            self.logger.debug(f"Converted to {len(unique_accessions)} unique SRA accessions")
-            return unique_accessions
+            accessions = {}
+            
+            for _, doc_sum in ET.iterparse(io.BytesIO(response.content), events=('end',)):
+                if doc_sum.tag != 'DocSum':
+                    continue
+                sra_id = doc_sum.findtext('Id')
+                # Runs are listed as escaped <Run acc="SRR..."/> markup in the Runs item
+                for item in doc_sum.iter('Item'):
+                    if item.get('Name') in ('Runs', 'Run') and item.text:
+                        accessions.setdefault(sra_id, []).extend(_SRR_RE.findall(item.text))
+                doc_sum.clear()
+            
+            return accessions
             
         except ET.ParseError as e:
             self.logger.error(f"Error parsing SRA summary response: {e}")
-            return []
+            raise
+    
+    def _wait_for_rate_limit(self):
+        """Block until the next NCBI request is allowed by the rate limit."""
+        with GSEFetcher._req_lock:
+            elapsed = time.monotonic() - GSEFetcher._last_req
+            if elapsed < NCBI_REQUEST_DELAY:
+                time.sleep(NCBI_REQUEST_DELAY - elapsed)
+            GSEFetcher._last_req = time.monotonic()
     
-    def _make_request(self, url: str, max_retries: int = 3) -> Optional[requests.Response]:
+    def _make_request(self, url: str,
+                      params: Optional[Dict[str, Any]] = None) -> 'requests.Response':
         """
-        Make HTTP request with retry logic and rate limiting.
+        Make HTTP request with rate limiting.
+        
+        Retries with exponential backoff are handled by the session's
+        transport adapter (see _get_session).
         
         Args:
             url: URL to request
-            max_retries: Maximum number of retry attempts
+            params: Query parameters, encoded by requests
             
         Returns:
-            Response object or None if failed
-        """
-        for attempt in range(max_retries):
-            try:
-                # Rate limiting - NCBI recommends no more than 3 requests per second
-                time.sleep(NCBI_REQUEST_DELAY)
-                
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                
-                return response
-                
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(f"Request attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries - 1:
-                    self.logger.error(f"All {max_retries} attempts failed for URL: {url}")
-                    return None
-                
-                # Exponential backoff
-                wait_time = (2 ** attempt) * NCBI_REQUEST_DELAY
-                time.sleep(wait_time)
-        
-        return None
\ No newline at end of file
+            Response object
+            
+        Raises:
+            requests.exceptions.RequestException: If the request failed
+        """
+        import requests
+        
+        try:
+            # Rate limiting - NCBI recommends no more than 3 requests per second
+            self._wait_for_rate_limit()
+            
+            response = self._get_session().get(url, params=params, timeout=30)
+            response.raise_for_status()
+            
+            return response
+            
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"NCBI request failed for URL {url}: {e}")
+            raise
@@ -1,45 +1,139 @@
 """Main controller for the seq_downloader application."""
 
 import os
+import re
+import json
+import time
+import atexit
 import sys
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional, List
 
-from .config import DEFAULT_OUTPUT_DIR, DEFAULT_LOG_DIR
-from .gse_fetcher import GSEFetcher
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None  # Progress bars are optional
+
+from .config import (
+    DEFAULT_OUTPUT_DIR, DEFAULT_LOG_DIR, DEFAULT_THREADS, MAX_THREADS,
+    CACHE_DIR, PERF_HINT_FILE, PERF_HINT_TTL, PERF_HINT_FAILED_TTL, BANDWIDTH_PROBE_URL,
+    BANDWIDTH_PROBE_SECONDS, BANDWIDTH_PROBE_TIMEOUT, MBPS_PER_DOWNLOAD
+)
 from .sra_downloader import SRADownloader
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# GEO series accession: 'GSE' followed by digits
+_GSE_RE = re.compile(r'^GSE\d+$', re.IGNORECASE)
+
+# SRA run accession: 'SRR', 'ERR' or 'DRR' followed by digits
+_SRA_RE = re.compile(r'^[SED]RR\d+$', re.IGNORECASE)
+
+# Accepted answers for interactive prompts ('' selects the default yes)
+_VALID_CHOICES = frozenset({'1', '2'})
+_YES = frozenset({'', 'y', 'yes'})
+_NO = frozenset({'n', 'no'})
+
+_log = logging.getLogger(__name__)
+
+# Background listener that writes queued log records to the real handlers
+_log_listener: Optional[QueueListener] = None
+
+
+class _TqdmConsoleHandler(logging.StreamHandler):
+    """Console handler that writes through tqdm so log lines do not break progress bars."""
+    
+    def emit(self, record):
+        try:
+            tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
 
 class MainController:
     """Main controller class for handling the interactive download process."""
     
-    def __init__(self):
-        """Initialize the MainController."""
-        self.output_dir = DEFAULT_OUTPUT_DIR
-        self.log_dir = DEFAULT_LOG_DIR
-        self.gse_fetcher = GSEFetcher()
+    def __init__(self, refresh_cache: bool = False):
+        """
+        Initialize the MainController.
+        
+        Args:
+            refresh_cache: Ignore cached GSE lookups and query NCBI again
+        """
+        self.refresh_cache = refresh_cache
+        self.output_dir = Path(DEFAULT_OUTPUT_DIR)
+        self.log_dir = Path(DEFAULT_LOG_DIR)
+        self._ensured_dirs = set()  # Output directories already created this session
         self.sra_downloader = None  # Will be initialized with user settings
         self.setup_logging()
     
     def setup_logging(self):
-        """Set up logging configuration."""
+        """
+        Set up logging configuration.
+        
+        Records are put on an in-memory queue and written to the console
+        (and later the log file) by a background QueueListener, so worker
+        code never waits on handler I/O.
+        """
+        global _log_listener
+        
+        root = logging.getLogger()
+        if not root.handlers:
+            log_queue = queue.SimpleQueue()
+            
+            # Console logging only; the log file is attached when run() starts
+            console_handler = (_TqdmConsoleHandler if tqdm else logging.StreamHandler)(sys.stdout)
+            console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            
+            _log_listener = QueueListener(log_queue, console_handler)
+            _log_listener.start()
+            atexit.register(_log_listener.stop)
+            
+            root.addHandler(QueueHandler(log_queue))
+            root.setLevel(logging.INFO)
+        self.logger = _log
+    
+    def _attach_file_handler(self):
+        """Attach the main.log file handler, creating the logs directory if needed."""
+        if getattr(self, '_file_handler', None):
+            return
+        
         # Create logs directory if it doesn't exist
-        Path(self.log_dir).mkdir(exist_ok=True)
-        
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(Path(self.log_dir) / 'main.log'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        if not self.log_dir.exists():
+            self.log_dir.mkdir(parents=True)
+        
+        handler = logging.FileHandler(self.log_dir / 'main.log')
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        if _log_listener is not None:
+            _log_listener.handlers = _log_listener.handlers + (handler,)
+        else:
+            logging.getLogger().addHandler(handler)
+        self._file_handler = handler
+    
+    @property
+    def http(self):
+        """Pooled HTTP session shared by all NCBI lookups, created on first use."""
+        if not hasattr(self, '_http'):
+            from .gse_fetcher import create_session
+            self._http = create_session()
+            atexit.register(self._http.close)
+        return self._http
+    
+    @property
+    def gse_fetcher(self):
+        """GSE fetcher, created on first use so SRA-only runs skip the network stack."""
+        if not hasattr(self, '_gse_fetcher'):
+            from .gse_fetcher import GSEFetcher
+            self._gse_fetcher = GSEFetcher(session=self.http)
+        return self._gse_fetcher
     
     def run(self) -> int:
         """Run the interactive download process."""
+        self._attach_file_handler()
+        
         try:
             print("Welcome to seq_downloader!")
             print("This tool helps you download sequencing data from SRA and GSE numbers.")
@@ -68,12 +162,12 @@ class MainController:
         """Get the user's choice for download method."""
         print("Choose download method:")
         print("1. Download from SRA ID(s)")
-        print("2. Download from GSE number")
+        print("2. Download from GSE number(s)")
         print()
         
         while True:
             choice = input("Enter your choice (1 or 2): ").strip()
-            if choice in ['1', '2']:
+            if choice in _VALID_CHOICES:
                 return choice
             print("Please enter 1 or 2.")
     
@@ -95,6 +189,14 @@ class MainController:
             print("No valid SRA IDs provided. Exiting.")
             return 1
         
+        # Validate SRA format; IDs are also used as directory names under output_dir
+        for sra_id in sra_ids:
+            if not _SRA_RE.match(sra_id):
+                print(f"Invalid SRA ID '{sra_id}': must be 'SRR', 'ERR' or 'DRR' followed by digits "
+                      "(e.g., SRR123456). Exiting.")
+                return 1
+        sra_ids = [sra_id.upper() for sra_id in sra_ids]
+        
         print(f"Will download {len(sra_ids)} SRA ID(s): {', '.join(sra_ids)}")
         
         # Get download settings
@@ -127,26 +229,42 @@ class MainController:
     def handle_gse_download(self) -> int:
         """Handle GSE number download process."""
         print("\nGSE Number Download")
-        print("Enter a GSE number (e.g., GSE123456)")
+        print("Enter GSE numbers separated by commas (e.g., GSE123456, GSE98765)")
         
-        gse_number = input("GSE Number: ").strip()
-        if not gse_number:
+        gse_input = input("GSE Number(s): ").strip()
+        gse_numbers = [gse_number.strip() for gse_number in gse_input.split(',')]
+        gse_numbers = [gse_number for gse_number in gse_numbers if gse_number]
+        if not gse_numbers:
             print("No GSE number provided. Exiting.")
             return 1
         
         # Validate GSE format
-        if not gse_number.upper().startswith('GSE'):
-            print("GSE number must start with 'GSE'. Exiting.")
-            return 1
+        for gse_number in gse_numbers:
+            if not _GSE_RE.match(gse_number):
+                print(f"Invalid GSE number '{gse_number}': must be 'GSE' followed by digits "
+                      "(e.g., GSE123456). Exiting.")
+                return 1
+        gse_numbers = [gse_number.upper() for gse_number in gse_numbers]
+        gse_label = ', '.join(gse_numbers)
         
-        print(f"Fetching SRA IDs for {gse_number}...")
+        print(f"Fetching SRA IDs for {gse_label}...")
         
         try:
-            # Fetch SRA IDs from GSE number
-            sra_ids = self.gse_fetcher.fetch_sra_ids(gse_number)
+            # Fetch SRA IDs from GSE numbers; several are looked up in one batch
+            if len(gse_numbers) == 1:
+                sra_ids = self.gse_fetcher.fetch_sra_ids(gse_numbers[0], refresh=self.refresh_cache)
+            else:
+                sra_ids_by_gse = self.gse_fetcher.fetch_sra_ids_batch(
+                    gse_numbers, refresh=self.refresh_cache
+                )
+                for gse_number, gse_sra_ids in sra_ids_by_gse.items():
+                    print(f"  {gse_number}: {len(gse_sra_ids)} SRA ID(s)")
+                sra_ids = list(dict.fromkeys(
+                    sra_id for gse_sra_ids in sra_ids_by_gse.values() for sra_id in gse_sra_ids
+                ))
             
             if not sra_ids:
-                print(f"No SRA IDs found for {gse_number}.")
+                print(f"No SRA IDs found for {gse_label}.")
                 return 1
             
             print(f"Found {len(sra_ids)} SRA ID(s): {', '.join(sra_ids)}")
@@ -179,7 +297,7 @@ class MainController:
                 return 1
             
         except Exception as e:
-            self.logger.error(f"Error fetching SRA IDs for {gse_number}: {e}")
+            self.logger.error(f"Error fetching SRA IDs for {gse_label}: {e}")
             print(f"Error fetching SRA IDs: {e}")
             return 1
     
@@ -189,42 +307,115 @@ class MainController:
         user_output = input("Enter output directory or press Enter for default: ").strip()
         
         if user_output:
-            output_dir = user_output
+            output_dir = Path(user_output)
         else:
             output_dir = self.output_dir
         
         # Create output directory if it doesn't exist
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        if output_dir not in self._ensured_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(output_dir)
         
-        return output_dir
+        return str(output_dir)
     
     def get_thread_count(self) -> int:
         """Get the number of threads for parallel downloads."""
-        print(f"\nThread count for parallel downloads (1-16, default: 4)")
+        default_threads = self.get_default_thread_count()
+        print(f"\nThread count for parallel downloads (1-{MAX_THREADS}, default: {default_threads})")
         while True:
             user_input = input("Enter thread count or press Enter for default: ").strip()
             
             if not user_input:
-                return 4
+                return default_threads
             
             try:
                 thread_count = int(user_input)
-                if 1 <= thread_count <= 16:
+                if 1 <= thread_count <= MAX_THREADS:
                     return thread_count
                 else:
-                    print("Please enter a number between 1 and 16.")
+                    print(f"Please enter a number between 1 and {MAX_THREADS}.")
             except ValueError:
                 print("Please enter a valid number.")
     
+    def get_default_thread_count(self) -> int:
+        """
+        Get the default thread count from measured bandwidth and CPU count.
+        
+        A short bandwidth probe is run and its result cached in
+        PERF_HINT_FILE for PERF_HINT_TTL seconds. If the probe fails,
+        DEFAULT_THREADS is cached for PERF_HINT_FAILED_TTL seconds instead,
+        so the probe is not retried every session but is not skipped for long.
+        """
+        hint_path = Path(CACHE_DIR).expanduser() / PERF_HINT_FILE
+        try:
+            hint = json.loads(hint_path.read_text())
+            ttl = PERF_HINT_TTL if hint.get('bandwidth_mbps') is not None else PERF_HINT_FAILED_TTL
+            if time.time() - hint['ts'] < ttl:
+                return int(hint['default_threads'])
+        except Exception:
+            pass
+        
+        print("Measuring download speed to choose a default thread count...")
+        bandwidth_mbps = self._probe_bandwidth()
+        if bandwidth_mbps is None:
+            default_threads = DEFAULT_THREADS
+        else:
+            cpu_limit = max(2, os.cpu_count() or 1)
+            default_threads = min(MAX_THREADS, cpu_limit, max(2, int(bandwidth_mbps / MBPS_PER_DOWNLOAD)))
+            self.logger.info(f"Measured {bandwidth_mbps:.0f} Mbit/s; default thread count {default_threads}")
+        
+        try:
+            hint_path.parent.mkdir(parents=True, exist_ok=True)
+            hint_path.write_text(json.dumps({
+                'default_threads': default_threads,
+                'bandwidth_mbps': bandwidth_mbps,
+                'ts': time.time()
+            }))
+        except OSError as e:
+            self.logger.debug(f"Could not save performance hint: {e}")
+        
+        return default_threads
+    
+    def _probe_bandwidth(self) -> Optional[float]:
+        """
+        Estimate download bandwidth by streaming from NCBI for a short time.
+        
+        Uses a single urllib request with a short timeout rather than the
+        retrying NCBI session, so a dead network fails fast and the SRA-only
+        path does not import requests.
+        
+        Returns:
+            Estimated bandwidth in Mbit/s, or None if the probe failed
+        """
+        from urllib.request import urlopen
+        
+        try:
+            received = 0
+            start = time.monotonic()
+            with urlopen(BANDWIDTH_PROBE_URL, timeout=BANDWIDTH_PROBE_TIMEOUT) as response:
+                while time.monotonic() - start < BANDWIDTH_PROBE_SECONDS:
+                    chunk = response.read(64 * 1024)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+            elapsed = time.monotonic() - start
+            if received == 0 or elapsed <= 0:
+                return None
+            return received * 8 / elapsed / 1e6
+            
+        except Exception as e:
+            self.logger.debug(f"Bandwidth probe failed: {e}")
+            return None
+    
     def get_split_files_option(self) -> bool:
         """Get whether to split paired-end files."""
         print(f"\nSplit paired-end files? (recommended for most datasets)")
         while True:
             user_input = input("Split files (y/n, default: y): ").strip().lower()
             
-            if not user_input or user_input in ['y', 'yes']:
+            if user_input in _YES:
                 return True
-            elif user_input in ['n', 'no']:
+            elif user_input in _NO:
                 return False
             else:
                 print("Please enter 'y' for yes or 'n' for no.")
\ No newline at end of file
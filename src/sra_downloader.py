@@ -1,20 +1,127 @@
 """SRA Downloader module for downloading sequencing data using SRA toolkit."""
 
 import os
+import re
 import sys
-import subprocess
-import logging
+import json
 import time
+import random
+import asyncio
+import logging
+import functools
+import shutil
+from collections import deque
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None  # Progress bars are optional
 
 from .config import (
-    SRATOOLKIT_PATH, PREFETCH_EXECUTABLE, FASTERQ_DUMP_EXECUTABLE,
-    DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, DEFAULT_TIMEOUT
+    SRATOOLKIT_PATH, PREFETCH_EXECUTABLE, FASTERQ_DUMP_EXECUTABLE, VDB_DUMP_EXECUTABLE,
+    DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, MAX_RETRY_DELAY, DEFAULT_TIMEOUT,
+    LARGE_SRA_THRESHOLD, LARGE_SRA_MAX_CONCURRENT, SIZE_QUERY_TIMEOUT, FASTERQ_DUMP_MEMORY,
+    APP_VERSION, SRA_MANIFEST_FILE
 )
 
+_log = logging.getLogger(__name__)
+
+# 'size   : 1,234,567' line in vdb-dump --info output
+_SIZE_RE = re.compile(r'^size\s*:\s*([\d,]+)', re.MULTILINE)
+
+_LINE_END_RE = re.compile(rb'[\r\n]')
+
+# Number of trailing stderr lines kept for error reporting
+STDERR_TAIL_LINES = 50
+
+# Seconds between download-size polls for prefetch progress bars
+PROGRESS_POLL_INTERVAL = 0.5
+
+
+def _retry_delay(attempt: int) -> float:
+    """
+    Compute the wait before the next retry.
+    
+    The delay doubles with each attempt up to MAX_RETRY_DELAY and is
+    randomly jittered so parallel downloads do not retry in lockstep.
+    
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        
+    Returns:
+        Delay in seconds
+    """
+    return min(MAX_RETRY_DELAY, DEFAULT_RETRY_DELAY * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+@functools.lru_cache(maxsize=1)
+def _resolve_sra_toolkit(toolkit_path: str) -> Tuple[Path, Path, Path, Optional[Path]]:
+    """
+    Locate and verify the SRA toolkit executables.
+    
+    The result is cached, so the filesystem is only checked the first
+    time a downloader is created.
+    
+    Args:
+        toolkit_path: SRA toolkit installation directory
+        
+    Returns:
+        Tuple of (bin directory, prefetch, fasterq-dump, vdb-dump or None
+        if vdb-dump is not installed)
+        
+    Raises:
+        FileNotFoundError: If the toolkit, prefetch or fasterq-dump is missing
+    """
+    suffix = ".exe" if os.name == "nt" else ""
+    sratoolkit_bin = Path(toolkit_path).resolve() / "bin"
+    prefetch_exe = sratoolkit_bin / f"{PREFETCH_EXECUTABLE}{suffix}"
+    fasterq_dump_exe = sratoolkit_bin / f"{FASTERQ_DUMP_EXECUTABLE}{suffix}"
+    vdb_dump_exe = sratoolkit_bin / f"{VDB_DUMP_EXECUTABLE}{suffix}"
+    
+    if not sratoolkit_bin.exists():
+        raise FileNotFoundError(f"SRA toolkit not found at {sratoolkit_bin}")
+    
+    if not prefetch_exe.exists():
+        raise FileNotFoundError(f"{prefetch_exe.name} not found at {prefetch_exe}")
+    
+    if not fasterq_dump_exe.exists():
+        raise FileNotFoundError(f"{fasterq_dump_exe.name} not found at {fasterq_dump_exe}")
+    
+    _log.info("SRA toolkit verified successfully")
+    return sratoolkit_bin, prefetch_exe, fasterq_dump_exe, (vdb_dump_exe if vdb_dump_exe.exists() else None)
+
+
+class _DownloadBatch:
+    """State shared by the downloads of a single download_sra_ids() call."""
+    
+    def __init__(self, max_threads: int, manifest: Dict[str, dict]):
+        """
+        Create the concurrency limits for a batch of downloads.
+        
+        Must be called while the event loop that runs the batch is running.
+        
+        Args:
+            max_threads: Maximum number of concurrent downloads
+            manifest: Download manifest, updated as runs complete
+        """
+        self.manifest = manifest
+        self.cached_runs = set()
+        self.sizes = {}
+        self.large_runs = set()
+        
+        self.prefetch_slots = asyncio.Semaphore(max_threads)
+        self.large_prefetch_slots = asyncio.Semaphore(min(max_threads, LARGE_SRA_MAX_CONCURRENT))
+        cpu_count = os.cpu_count() or 1
+        fastq_jobs = max(1, min(max_threads, cpu_count))
+        self.fastq_slots = asyncio.Semaphore(fastq_jobs)
+        self.fastq_threads = max(1, cpu_count // fastq_jobs)
+        
+        # SRA file cleanup runs on a worker thread so downloads move on immediately
+        self.cleanup_tasks = []
+        self.overall_bar = None
+
 
 class SRADownloader:
     """Class for downloading SRA data using SRA toolkit."""
@@ -29,40 +136,30 @@ class SRADownloader:
         """
         self.output_dir = Path(output_dir)
         self.max_threads = max_threads
-        self.logger = logging.getLogger(__name__)
-        self.lock = threading.Lock()
+        self.logger = _log
         
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.output_dir / ".cache" / SRA_MANIFEST_FILE
+        self.temp_dir = self.output_dir / ".tmp"  # fasterq-dump scratch space
         
-        # Set up SRA toolkit paths
-        self.sratoolkit_bin = Path(SRATOOLKIT_PATH) / "bin"
-        self.prefetch_exe = self.sratoolkit_bin / f"{PREFETCH_EXECUTABLE}.exe"
-        self.fasterq_dump_exe = self.sratoolkit_bin / f"{FASTERQ_DUMP_EXECUTABLE}.exe"
-        
-        # Verify SRA toolkit installation
-        self._verify_sra_toolkit()
-    
-    def _verify_sra_toolkit(self):
-        """Verify that SRA toolkit is properly installed."""
-        if not self.sratoolkit_bin.exists():
-            raise FileNotFoundError(f"SRA toolkit not found at {self.sratoolkit_bin}")
-        
-        if not self.prefetch_exe.exists():
-            raise FileNotFoundError(f"prefetch.exe not found at {self.prefetch_exe}")
-        
-        if not self.fasterq_dump_exe.exists():
-            raise FileNotFoundError(f"fasterq-dump.exe not found at {self.fasterq_dump_exe}")
-        
-        self.logger.info("SRA toolkit verified successfully")
+        # Set up SRA toolkit paths (resolved and verified once per process)
+        (self.sratoolkit_bin, self.prefetch_exe,
+         self.fasterq_dump_exe, self.vdb_dump_exe) = _resolve_sra_toolkit(SRATOOLKIT_PATH)
     
-    def download_sra_ids(self, sra_ids: List[str], split_files: bool = True) -> Dict[str, bool]:
+    def download_sra_ids(self, sra_ids: List[str], split_files: bool = True,
+                         force: bool = False) -> Dict[str, bool]:
         """
         Download multiple SRA IDs with parallel processing.
         
+        Downloads run as subprocesses supervised by a single asyncio event
+        loop, with at most max_threads running at once. Runs whose FASTQ
+        files are already present are skipped unless force is set.
+        
         Args:
             sra_ids: List of SRA IDs to download
             split_files: Whether to split paired-end files
+            force: Re-download runs even if their FASTQ files already exist
             
         Returns:
             Dictionary mapping SRA ID to success status
@@ -75,76 +172,287 @@ class SRADownloader:
         
         self.logger.info(f"Starting download of {len(sra_ids)} SRA IDs with {self.max_threads} threads")
         
-        # Use ThreadPoolExecutor for parallel downloads
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            # Submit all download tasks
-            future_to_sra = {
-                executor.submit(self._download_single_sra, sra_id, split_files): sra_id
-                for sra_id in sra_ids
-            }
-            
-            # Process completed downloads
-            for future in as_completed(future_to_sra):
-                sra_id = future_to_sra[future]
-                try:
-                    success = future.result()
-                    results[sra_id] = success
-                    
-                    with self.lock:
-                        if success:
-                            self.logger.info(f"✓ Successfully downloaded {sra_id}")
-                            print(f"✓ Successfully downloaded {sra_id}")
-                        else:
-                            self.logger.error(f"✗ Failed to download {sra_id}")
-                            print(f"✗ Failed to download {sra_id}")
-                            
-                except Exception as e:
-                    results[sra_id] = False
-                    with self.lock:
-                        self.logger.error(f"✗ Error downloading {sra_id}: {e}")
-                        print(f"✗ Error downloading {sra_id}: {e}")
+        if sys.platform == 'win32':
+            # Subprocesses need the proactor loop, which only became the default in Python 3.8
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        
+        results = asyncio.run(self._download_all(sra_ids, split_files, force))
         
         # Summary
         successful = sum(1 for success in results.values() if success)
         total = len(results)
         
-        print(f"\nDownload Summary:")
-        print(f"  Total: {total}")
-        print(f"  Successful: {successful}")
-        print(f"  Failed: {total - successful}")
+        print(f"\nDownload Summary:\n"
+              f"  Total: {total}\n"
+              f"  Successful: {successful}\n"
+              f"  Failed: {total - successful}")
         
         return results
     
-    def _download_single_sra(self, sra_id: str, split_files: bool = True) -> bool:
+    async def _download_all(self, sra_ids: List[str], split_files: bool,
+                            force: bool = False) -> Dict[str, bool]:
+        """
+        Download all SRA IDs as a two-stage prefetch -> fasterq-dump pipeline.
+        
+        The network-bound prefetch stage is limited to max_threads concurrent
+        downloads. The CPU-bound conversion stage runs up to max_threads
+        fasterq-dump jobs that split the CPU cores between them, so the next
+        prefetch proceeds while earlier files are being converted.
+        
+        Args:
+            sra_ids: List of SRA IDs to download
+            split_files: Whether to split paired-end files
+            force: Re-download runs even if their FASTQ files already exist
+            
+        Returns:
+            Dictionary mapping SRA ID to success status
+        """
+        batch = self._new_batch()
+        if not force:
+            status = self.get_download_status(sra_ids)
+            downloaded = [sra_id for sra_id in sra_ids if status[sra_id] == 'downloaded']
+            if self.manifest_path.exists():
+                batch.cached_runs = {sra_id for sra_id in downloaded if self._is_cached(sra_id, batch.manifest)}
+            else:
+                # Downloads from before the manifest existed are trusted once
+                batch.cached_runs = set(downloaded)
+        
+        if not self.manifest_path.exists():
+            # Written before any conversion runs, so FASTQ files left by a failed
+            # download are never mistaken for downloads from before the manifest
+            self._record_in_manifest([sra_id for sra_id in sra_ids if sra_id in batch.cached_runs], batch.manifest)
+        
+        # Look up run sizes first so large runs can be routed to their own slots
+        pending = [sra_id for sra_id in sra_ids if sra_id not in batch.cached_runs]
+        sizes = await asyncio.gather(*[self._query_sra_size(sra_id, batch.prefetch_slots) for sra_id in pending])
+        batch.sizes = dict(zip(pending, sizes))
+        batch.large_runs = {
+            sra_id for sra_id, size in zip(pending, sizes)
+            if size is not None and size > LARGE_SRA_THRESHOLD
+        }
+        if batch.large_runs:
+            self.logger.info(f"{len(batch.large_runs)} large SRA run(s) will be downloaded "
+                             f"at most {LARGE_SRA_MAX_CONCURRENT} at a time")
+        
+        batch.overall_bar = tqdm(total=len(sra_ids), unit='run', desc='Downloads') if tqdm else None
+        try:
+            outcomes = await asyncio.gather(
+                *[self._run_download(sra_id, split_files, batch) for sra_id in sra_ids]
+            )
+        finally:
+            if batch.overall_bar is not None:
+                batch.overall_bar.close()
+        await asyncio.gather(*batch.cleanup_tasks)
+        
+        # Remove the fasterq-dump scratch directory unless it still holds files
+        try:
+            self.temp_dir.rmdir()
+        except OSError:
+            pass
+        return dict(zip(sra_ids, outcomes))
+    
+    def _new_batch(self) -> _DownloadBatch:
+        """
+        Create the state for a batch of downloads, starting from the saved manifest.
+        
+        Returns:
+            New download batch
+        """
+        return _DownloadBatch(self.max_threads, self._load_manifest())
+    
+    async def _query_sra_size(self, sra_id: str, slots: Optional[asyncio.Semaphore] = None) -> Optional[int]:
+        """
+        Query the archive size of an SRA run using vdb-dump --info.
+        
+        Args:
+            sra_id: SRA ID to query
+            slots: Semaphore limiting concurrent queries, if any
+            
+        Returns:
+            Size in bytes, or None if it could not be determined
+        """
+        if self.vdb_dump_exe is None:
+            return None
+        
+        try:
+            async with slots or asyncio.Semaphore():
+                proc = await asyncio.create_subprocess_exec(
+                    str(self.vdb_dump_exe), "--info", sra_id,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                try:
+                    stdout, _ = await asyncio.wait_for(proc.communicate(), SIZE_QUERY_TIMEOUT)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    raise
+            
+            match = _SIZE_RE.search(stdout.decode(errors='replace'))
+            if proc.returncode == 0 and match:
+                return int(match.group(1).replace(',', ''))
+            
+        except Exception as e:
+            self.logger.debug(f"Could not determine size of {sra_id}: {e}")
+        
+        return None
+    
+    async def _run_download(self, sra_id: str, split_files: bool, batch: _DownloadBatch) -> bool:
+        """
+        Download a single SRA ID and report the outcome.
+        
+        Args:
+            sra_id: SRA ID to download
+            split_files: Whether to split paired-end files
+            batch: State of the batch the download belongs to
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            success = await self._download_single_sra(sra_id, split_files, batch)
+            if batch.overall_bar is not None:
+                batch.overall_bar.update(1)
+            
+            if success:
+                self.logger.info(f"✓ Successfully downloaded {sra_id}")
+            else:
+                self.logger.error(f"✗ Failed to download {sra_id}")
+            return success
+            
+        except Exception as e:
+            self.logger.error(f"✗ Error downloading {sra_id}: {e}")
+            return False
+    
+    async def _run_command(self, cmd: List[str]) -> Tuple[int, str]:
+        """
+        Run an SRA toolkit command in the output directory.
+        
+        stdout is discarded and stderr is streamed to the debug log, so
+        memory use stays bounded however much progress output the tool writes.
+        
+        Args:
+            cmd: Command and arguments to execute
+            
+        Returns:
+            Tuple of (return code, last STDERR_TAIL_LINES lines of stderr)
+            
+        Raises:
+            asyncio.TimeoutError: If the command exceeds DEFAULT_TIMEOUT
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(self.output_dir)
+        )
+        tool_name = Path(cmd[0]).stem
+        tail = deque(maxlen=STDERR_TAIL_LINES)
+        
+        async def drain_stderr():
+            # Progress output is terminated by '\r', so split on both line endings
+            pending = b''
+            while True:
+                chunk = await proc.stderr.read(4096)
+                if not chunk:
+                    break
+                *lines, pending = _LINE_END_RE.split(pending + chunk)
+                for raw_line in lines:
+                    line = raw_line.decode(errors='replace').strip()
+                    if line:
+                        tail.append(line)
+                        self.logger.debug(f"{tool_name}: {line}")
+            if pending.strip():
+                tail.append(pending.decode(errors='replace').strip())
+            await proc.wait()
+        
+        try:
+            await asyncio.wait_for(drain_stderr(), DEFAULT_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        
+        return proc.returncode, '\n'.join(tail)
+    
+    async def _download_single_sra(self, sra_id: str, split_files: bool = True,
+                                   batch: Optional[_DownloadBatch] = None) -> bool:
         """
         Download a single SRA ID.
         
         Args:
             sra_id: SRA ID to download
             split_files: Whether to split paired-end files
+            batch: State of the batch the download belongs to; a batch of one
+                is created if omitted
             
         Returns:
             True if successful, False otherwise
         """
+        if batch is None:
+            batch = self._new_batch()
+        
+        if sra_id in batch.cached_runs:
+            self.logger.info(f"Cache hit: FASTQ files for {sra_id} already exist, skipping download")
+            return True
+        
         try:
             # Step 1: Prefetch the SRA file
-            if not self._prefetch_sra(sra_id):
-                return False
+            slots = batch.large_prefetch_slots if sra_id in batch.large_runs else batch.prefetch_slots
+            async with slots:
+                monitor = (asyncio.ensure_future(self._track_prefetch_progress(sra_id, batch.sizes.get(sra_id)))
+                           if tqdm else None)
+                try:
+                    if not await self._prefetch_sra(sra_id):
+                        return False
+                finally:
+                    if monitor is not None:
+                        monitor.cancel()
+                        await asyncio.gather(monitor, return_exceptions=True)
             
             # Step 2: Convert to FASTQ using fasterq-dump
-            if not self._convert_to_fastq(sra_id, split_files):
-                return False
+            async with batch.fastq_slots:
+                if not await self._convert_to_fastq(sra_id, split_files, threads=batch.fastq_threads):
+                    return False
             
-            # Step 3: Clean up SRA file (optional)
-            self._cleanup_sra_file(sra_id)
+            # Step 3: Clean up SRA file (optional) in the background
+            loop = asyncio.get_running_loop()
+            batch.cleanup_tasks.append(loop.run_in_executor(None, self._cleanup_sra_file, sra_id))
             
+            self._record_in_manifest([sra_id], batch.manifest)
             return True
             
         except Exception as e:
             self.logger.error(f"Error downloading {sra_id}: {e}")
             return False
     
-    def _prefetch_sra(self, sra_id: str, max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
+    async def _track_prefetch_progress(self, sra_id: str, total: Optional[int] = None):
+        """
+        Show a byte progress bar for a prefetch by polling its download directory.
+        
+        Runs until cancelled by the caller once the prefetch finishes.
+        
+        Args:
+            sra_id: SRA ID being prefetched
+            total: Expected download size in bytes, if known
+        """
+        bar = tqdm(total=total, unit='B', unit_scale=True,
+                   desc=sra_id, leave=False)
+        sra_dir = self.output_dir / sra_id
+        try:
+            while True:
+                await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+                try:
+                    with os.scandir(sra_dir) as entries:
+                        downloaded = sum(entry.stat().st_size for entry in entries if entry.is_file())
+                except OSError:
+                    continue
+                if downloaded > bar.n:
+                    bar.update(downloaded - bar.n)
+        finally:
+            bar.close()
+    
+    async def _prefetch_sra(self, sra_id: str, max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
         """
         Prefetch SRA file using prefetch tool.
         
@@ -155,50 +463,16 @@ class SRADownloader:
         Returns:
             True if successful, False otherwise
         """
-        for attempt in range(max_retries):
-            try:
-                cmd = [
-                    str(self.prefetch_exe),
-                    sra_id,
-                    "--output-directory", str(self.output_dir),
-                    "--progress"
-                ]
-                
-                with self.lock:
-                    self.logger.debug(f"Prefetching {sra_id} (attempt {attempt + 1}/{max_retries})")
-                
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=DEFAULT_TIMEOUT,
-                    cwd=str(self.output_dir)
-                )
-                
-                if result.returncode == 0:
-                    return True
-                else:
-                    with self.lock:
-                        self.logger.warning(f"Prefetch attempt {attempt + 1} failed for {sra_id}: {result.stderr}")
-                    
-                    if attempt < max_retries - 1:
-                        time.sleep(DEFAULT_RETRY_DELAY)
-                    
-            except subprocess.TimeoutExpired:
-                with self.lock:
-                    self.logger.warning(f"Prefetch timeout for {sra_id} (attempt {attempt + 1})")
-                if attempt < max_retries - 1:
-                    time.sleep(DEFAULT_RETRY_DELAY)
-                    
-            except Exception as e:
-                with self.lock:
-                    self.logger.error(f"Prefetch error for {sra_id} (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(DEFAULT_RETRY_DELAY)
+        cmd = [
+            str(self.prefetch_exe),
+            sra_id,
+            "--output-directory", str(self.output_dir)
+        ]
         
-        return False
+        return await self._run_with_retries(cmd, sra_id, "Prefetch", max_retries)
     
-    def _convert_to_fastq(self, sra_id: str, split_files: bool = True, max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
+    async def _convert_to_fastq(self, sra_id: str, split_files: bool = True, max_retries: int = DEFAULT_MAX_RETRIES,
+                                threads: int = 1) -> bool:
         """
         Convert SRA file to FASTQ using fasterq-dump.
         
@@ -206,81 +480,170 @@ class SRADownloader:
             sra_id: SRA ID to convert
             split_files: Whether to split paired-end files
             max_retries: Maximum number of retry attempts
+            threads: Number of fasterq-dump decoding threads
             
         Returns:
             True if successful, False otherwise
         """
+        cmd = [
+            str(self.fasterq_dump_exe),
+            sra_id,
+            "--outdir", str(self.output_dir)
+        ]
+        
+        # Decode with multiple threads, keeping the total across jobs near the core count
+        self.temp_dir.mkdir(exist_ok=True)
+        cmd += [
+            "--threads", str(threads),
+            "--mem", FASTERQ_DUMP_MEMORY,
+            "--temp", str(self.temp_dir)
+        ]
+        
+        if split_files:
+            cmd.append("--split-files")
+        
+        # Existing FASTQ files are never trusted once a run is converted: they are
+        # stale, forced, or partial output from an earlier failed attempt
+        cmd.append("--force")
+        
+        return await self._run_with_retries(cmd, sra_id, "FASTQ conversion", max_retries)
+    
+    async def _run_with_retries(self, cmd: List[str], sra_id: str, step: str,
+                                max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
+        """
+        Run a toolkit command, retrying failures with jittered exponential backoff.
+        
+        Args:
+            cmd: Command and arguments to execute
+            sra_id: SRA ID the command operates on
+            step: Name of the step for log messages (e.g., 'Prefetch')
+            max_retries: Maximum number of attempts
+            
+        Returns:
+            True if the command eventually succeeded, False otherwise
+        """
         for attempt in range(max_retries):
             try:
-                cmd = [
-                    str(self.fasterq_dump_exe),
-                    sra_id,
-                    "--outdir", str(self.output_dir),
-                    "--progress"
-                ]
+                self.logger.debug(f"{step} of {sra_id} (attempt {attempt + 1}/{max_retries})")
                 
-                if split_files:
-                    cmd.append("--split-files")
+                returncode, stderr = await self._run_command(cmd)
                 
-                with self.lock:
-                    self.logger.debug(f"Converting {sra_id} to FASTQ (attempt {attempt + 1}/{max_retries})")
+                if returncode == 0:
+                    return True
+                level, message = logging.WARNING, f"{step} attempt {attempt + 1} failed for {sra_id}: {stderr}"
                 
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=DEFAULT_TIMEOUT,
-                    cwd=str(self.output_dir)
-                )
+            except asyncio.TimeoutError:
+                level, message = logging.WARNING, f"{step} timeout for {sra_id} (attempt {attempt + 1})"
                 
-                if result.returncode == 0:
-                    return True
-                else:
-                    with self.lock:
-                        self.logger.warning(f"FASTQ conversion attempt {attempt + 1} failed for {sra_id}: {result.stderr}")
-                    
-                    if attempt < max_retries - 1:
-                        time.sleep(DEFAULT_RETRY_DELAY)
-                    
-            except subprocess.TimeoutExpired:
-                with self.lock:
-                    self.logger.warning(f"FASTQ conversion timeout for {sra_id} (attempt {attempt + 1})")
-                if attempt < max_retries - 1:
-                    time.sleep(DEFAULT_RETRY_DELAY)
-                    
             except Exception as e:
-                with self.lock:
-                    self.logger.error(f"FASTQ conversion error for {sra_id} (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(DEFAULT_RETRY_DELAY)
+                level, message = logging.ERROR, f"{step} error for {sra_id} (attempt {attempt + 1}): {e}"
+            
+            self.logger.log(level, message)
+            
+            if attempt < max_retries - 1:
+                await asyncio.sleep(_retry_delay(attempt))
         
         return False
     
+    def _find_fastq_files(self, sra_id: str) -> List[Path]:
+        """
+        Find the FASTQ files produced for an SRA ID.
+        
+        Args:
+            sra_id: SRA ID to look up
+            
+        Returns:
+            Sorted list of FASTQ file paths
+        """
+        return sorted(
+            path for path in self.output_dir.glob(f"{sra_id}*.fastq")
+            if path.name == f"{sra_id}.fastq" or path.name.startswith(f"{sra_id}_")
+        )
+    
+    def _load_manifest(self) -> Dict[str, dict]:
+        """Load the download manifest, returning an empty one if missing or unreadable."""
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except Exception:
+            return {}
+    
+    def _record_in_manifest(self, sra_ids: List[str], manifest: Dict[str, dict]):
+        """
+        Record the FASTQ files of completed downloads in the manifest and save it.
+        
+        Args:
+            sra_ids: SRA IDs that were downloaded
+            manifest: Manifest to update
+        """
+        for sra_id in sra_ids:
+            manifest[sra_id] = {
+                "fastq_files": {
+                    path.name: {"size": stat.st_size, "mtime": stat.st_mtime}
+                    for path in self._find_fastq_files(sra_id)
+                    for stat in [path.stat()]
+                },
+                "app_version": APP_VERSION,
+                "timestamp": time.time(),
+            }
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(manifest, indent=2))
+            tmp_path.replace(self.manifest_path)
+        except OSError as e:
+            self.logger.debug(f"Could not update download manifest: {e}")
+    
+    def _is_cached(self, sra_id: str, manifest: Dict[str, dict]) -> bool:
+        """
+        Check whether an SRA ID's existing FASTQ files can be reused.
+        
+        Files recorded in the manifest must still match their recorded size
+        and modification time. Runs without a manifest entry, such as those
+        left by an interrupted download, are not reused.
+        
+        Args:
+            sra_id: SRA ID whose FASTQ files are present
+            manifest: Download manifest
+            
+        Returns:
+            True if the existing FASTQ files can be reused
+        """
+        entry = manifest.get(sra_id)
+        if entry is None:
+            return False
+        
+        for name, recorded in entry.get("fastq_files", {}).items():
+            try:
+                stat = (self.output_dir / name).stat()
+            except OSError:
+                return False
+            if stat.st_size != recorded["size"] or stat.st_mtime != recorded["mtime"]:
+                return False
+        return True
+    
     def _cleanup_sra_file(self, sra_id: str):
         """
         Clean up the downloaded SRA file to save space.
         
+        Removes the whole prefetch directory, including sidecar files such
+        as .vdbcache that prefetch leaves next to the .sra file.
+        
         Args:
             sra_id: SRA ID to clean up
         """
+        # SRA files are typically stored in a subdirectory
+        output_dir = self.output_dir.resolve()
+        sra_dir = (output_dir / sra_id).resolve()
+        if sra_dir.parent != output_dir or sra_dir.name.startswith('.'):
+            # Never remove anything but a run directory directly inside output_dir
+            self.logger.warning(f"Not cleaning up {sra_id}: {sra_dir} is not a download directory in {output_dir}")
+            return
+        
         try:
-            # SRA files are typically stored in a subdirectory
-            sra_file = self.output_dir / sra_id / f"{sra_id}.sra"
-            if sra_file.exists():
-                sra_file.unlink()
-                self.logger.debug(f"Cleaned up SRA file for {sra_id}")
-                
-            # Also try to remove the directory if it's empty
-            sra_dir = self.output_dir / sra_id
-            if sra_dir.exists() and sra_dir.is_dir():
-                try:
-                    sra_dir.rmdir()  # Only removes if empty
-                    self.logger.debug(f"Removed empty SRA directory for {sra_id}")
-                except OSError:
-                    pass  # Directory not empty, that's fine
-                    
-        except Exception as e:
-            self.logger.debug(f"Could not clean up SRA file for {sra_id}: {e}")
+            shutil.rmtree(sra_dir)
+            self.logger.debug(f"Cleaned up SRA directory for {sra_id}")
+        except OSError as e:
+            self.logger.debug(f"Could not clean up SRA directory for {sra_id}: {e}")
     
     def get_download_status(self, sra_ids: List[str]) -> Dict[str, str]:
         """
@@ -292,20 +655,26 @@ class SRADownloader:
         Returns:
             Dictionary mapping SRA ID to status ('downloaded', 'partial', 'missing')
         """
+        # Index the output directory once instead of globbing it per SRA ID
+        fastq_ids = set()
+        subdirs = set()
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.fastq') and entry.is_file():
+                    # SRR123.fastq, SRR123_1.fastq -> SRR123
+                    fastq_ids.add(entry.name[:-len('.fastq')].split('_')[0])
+                elif entry.is_dir():
+                    subdirs.add(entry.name)
+        
         status = {}
         
         for sra_id in sra_ids:
-            # Check for FASTQ files
-            fastq_files = list(self.output_dir.glob(f"{sra_id}*.fastq"))
-            
-            if fastq_files:
+            if sra_id in fastq_ids:
                 status[sra_id] = 'downloaded'
+            elif sra_id in subdirs and (self.output_dir / sra_id / f"{sra_id}.sra").is_file():
+                # SRA file prefetched but not yet converted
+                status[sra_id] = 'partial'
             else:
-                # Check for SRA file
-                sra_file = self.output_dir / sra_id / f"{sra_id}.sra"
-                if sra_file.exists():
-                    status[sra_id] = 'partial'
-                else:
-                    status[sra_id] = 'missing'
+                status[sra_id] = 'missing'
         
         return status
\ No newline at end of file
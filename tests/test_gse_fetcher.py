@@ -0,0 +1,168 @@
+"""Tests for GSE to SRA lookups in gse_fetcher, using canned NCBI E-utilities responses."""
+
+import pytest
+import requests
+
+from src import gse_fetcher
+from src.config import NCBI_ESEARCH_URL, NCBI_ELINK_URL, NCBI_ESUMMARY_URL
+from src.gse_fetcher import GSEFetcher
+
+# GEO database ID -> accession, as returned by esummary on db=gds
+GEO_ACCESSIONS = {'200001': 'GSE1', '200002': 'GSE2', '200003': 'GPL99'}
+
+# GEO database ID -> linked numeric SRA IDs, as returned by elink
+GEO_LINKS = {'200001': ['9001', '9002'], '200002': ['9003'], '200003': ['9004']}
+
+# Numeric SRA ID -> run accessions, as returned by esummary on db=sra
+SRA_RUNS = {'9001': ['SRR100', 'SRR101'], '9002': ['SRR102'], '9003': ['SRR200'], '9004': ['SRR900']}
+
+
+# Numeric SRA IDs whose esummary request fails, set by individual tests
+FAILING_SRA_IDS = set()
+
+
+def _ids(params):
+    ids = params['id']
+    return ids if isinstance(ids, list) else ids.split(',')
+
+
+def _esearch(params):
+    accessions = {term.split('[')[0] for term in params['term'].split(' OR ')}
+    # Searching by accession also returns related records, such as the platform
+    ids = [geo_id for geo_id, accession in GEO_ACCESSIONS.items()
+           if accession in accessions or accession.startswith('GPL')]
+    id_list = ''.join(f'<Id>{geo_id}</Id>' for geo_id in ids)
+    return f'<eSearchResult><Count>{len(ids)}</Count><IdList>{id_list}</IdList></eSearchResult>'
+
+
+def _gds_summary(params):
+    doc_sums = ''.join(
+        f'<DocSum><Id>{geo_id}</Id><Item Name="Accession" Type="String">{GEO_ACCESSIONS[geo_id]}</Item></DocSum>'
+        for geo_id in _ids(params)
+    )
+    return f'<eSummaryResult>{doc_sums}</eSummaryResult>'
+
+
+def _elink(params):
+    link_sets = []
+    for geo_id in _ids(params):
+        links = ''.join(f'<Link><Id>{sra_id}</Id></Link>' for sra_id in GEO_LINKS[geo_id])
+        link_sets.append(
+            f'<LinkSet><DbFrom>gds</DbFrom><IdList><Id>{geo_id}</Id></IdList>'
+            f'<LinkSetDb><DbTo>sra</DbTo><LinkName>gds_sra</LinkName>{links}</LinkSetDb>'
+            f'<LinkSetDb><DbTo>pubmed</DbTo><LinkName>gds_pubmed</LinkName>'
+            f'<Link><Id>123</Id></Link></LinkSetDb></LinkSet>'
+        )
+    return f'<eLinkResult>{"".join(link_sets)}</eLinkResult>'
+
+
+def _sra_summary(params):
+    doc_sums = []
+    for sra_id in _ids(params):
+        runs = ''.join(f'&lt;Run acc="{srr_id}" total_spots="10" is_public="true"/&gt;'
+                       for srr_id in SRA_RUNS[sra_id])
+        doc_sums.append(
+            f'<DocSum><Id>{sra_id}</Id>'
+            f'<Item Name="ExpXml" Type="String">&lt;Summary&gt;&lt;Title&gt;x&lt;/Title&gt;&lt;/Summary&gt;</Item>'
+            f'<Item Name="Runs" Type="String">{runs}</Item></DocSum>'
+        )
+    return f'<eSummaryResult>{"".join(doc_sums)}</eSummaryResult>'
+
+
+class FakeSession:
+    """Stand-in for the NCBI requests Session that serves canned responses."""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def get(self, url, params=None, timeout=None):
+        self.requests.append((url, params))
+        response = requests.Response()
+        response.url = url
+        if params.get('db') == 'sra' and FAILING_SRA_IDS.intersection(_ids(params)):
+            response.status_code = 500
+            return response
+        if url == NCBI_ESEARCH_URL:
+            body = _esearch(params)
+        elif url == NCBI_ELINK_URL:
+            body = _elink(params)
+        elif url == NCBI_ESUMMARY_URL and params['db'] == 'gds':
+            body = _gds_summary(params)
+        else:
+            body = _sra_summary(params)
+        response.status_code = 200
+        response._content = body.encode()
+        return response
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def requests_made(monkeypatch, tmp_path):
+    """Serve canned E-utilities responses, isolate the caches and record each request."""
+    monkeypatch.setattr(gse_fetcher, '_CACHE_PATH', tmp_path / 'gse_cache.json')
+    monkeypatch.setattr(gse_fetcher, '_memory_cache', {})
+    monkeypatch.setattr(GSEFetcher, '_wait_for_rate_limit', lambda self: None)
+    FAILING_SRA_IDS.clear()
+    
+    session = FakeSession()
+    monkeypatch.setattr(gse_fetcher, 'create_session', lambda: session)
+    return session.requests
+
+
+def test_fetch_sra_ids_returns_run_accessions(requests_made):
+    assert GSEFetcher().fetch_sra_ids('gse1') == ['SRR100', 'SRR101', 'SRR102']
+
+
+def test_single_and_batch_lookups_agree(requests_made):
+    single = GSEFetcher().fetch_sra_ids('GSE1', refresh=True)
+    batch = GSEFetcher().fetch_sra_ids_batch(['GSE1', 'GSE2'], refresh=True)
+    
+    assert batch == {'GSE1': single, 'GSE2': ['SRR200']}
+
+
+def test_batch_lookup_uses_one_request_per_step(requests_made):
+    GSEFetcher().fetch_sra_ids_batch(['GSE1', 'GSE2'])
+    
+    assert [url for url, _ in requests_made] == [
+        NCBI_ESEARCH_URL, NCBI_ESUMMARY_URL, NCBI_ELINK_URL, NCBI_ESUMMARY_URL
+    ]
+
+
+def test_unrequested_geo_records_are_ignored(requests_made):
+    results = GSEFetcher().fetch_sra_ids_batch(['GSE2'])
+    
+    assert results == {'GSE2': ['SRR200']}
+
+
+def test_lookups_are_cached(requests_made):
+    GSEFetcher().fetch_sra_ids('GSE1')
+    request_count = len(requests_made)
+    
+    # Served from the in-process cache, then from disk once that is cleared
+    assert GSEFetcher().fetch_sra_ids('GSE1') == ['SRR100', 'SRR101', 'SRR102']
+    gse_fetcher._memory_cache.clear()
+    assert GSEFetcher().fetch_sra_ids('GSE1') == ['SRR100', 'SRR101', 'SRR102']
+    assert len(requests_made) == request_count
+    
+    GSEFetcher().fetch_sra_ids('GSE1', refresh=True)
+    assert len(requests_made) > request_count
+
+
+def test_unknown_gse_returns_no_ids(requests_made):
+    assert GSEFetcher().fetch_sra_ids('GSE404') == []
+
+
+def test_failed_summary_batch_is_not_cached(requests_made, monkeypatch):
+    # One esummary batch per SRA ID linked to GSE1; the second one fails
+    monkeypatch.setattr(gse_fetcher, 'NCBI_ESUMMARY_BATCH_SIZE', 1)
+    FAILING_SRA_IDS.add('9002')
+    
+    with pytest.raises(Exception, match='Failed to fetch SRA IDs for GSE1'):
+        GSEFetcher().fetch_sra_ids('GSE1')
+    assert not gse_fetcher._memory_cache
+    assert not gse_fetcher._CACHE_PATH.exists()
+    
+    FAILING_SRA_IDS.clear()
+    assert GSEFetcher().fetch_sra_ids('GSE1') == ['SRR100', 'SRR101', 'SRR102']
@@ -0,0 +1,119 @@
+"""Tests for SRADownloader's manifest-based skipping, using a stub SRA toolkit."""
+
+import os
+import stat
+
+import pytest
+
+from src import sra_downloader
+from src.sra_downloader import SRADownloader
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="stub toolkit uses POSIX shell scripts")
+
+# prefetch <id> --output-directory <dir>
+PREFETCH_STUB = '''#!/bin/sh
+echo "prefetch $*" >> "$STUB_LOG"
+mkdir -p "$3/$1" && echo sra > "$3/$1/$1.sra"
+'''
+
+# fasterq-dump <id> --outdir <dir> ...; like the real tool, it will not
+# overwrite existing output without --force, and can fail part-way through
+FASTERQ_DUMP_STUB = '''#!/bin/sh
+echo "fasterq-dump $*" >> "$STUB_LOG"
+case " $* " in
+    *" --force "*) ;;
+    *) if [ -e "$3/$1_1.fastq" ]; then echo "file exists" >&2; exit 3; fi ;;
+esac
+echo "@$1" > "$3/$1_1.fastq"
+if [ -e "$STUB_FAIL" ]; then exit 1; fi
+echo "@$1" > "$3/$1_2.fastq"
+'''
+
+
+@pytest.fixture
+def toolkit(monkeypatch, tmp_path):
+    """Install the stub toolkit and return a function that reads its command log."""
+    bin_dir = tmp_path / 'sratoolkit' / 'bin'
+    bin_dir.mkdir(parents=True)
+    for name, script in (('prefetch', PREFETCH_STUB), ('fasterq-dump', FASTERQ_DUMP_STUB)):
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    
+    log_path = tmp_path / 'calls.log'
+    monkeypatch.setenv('STUB_LOG', str(log_path))
+    monkeypatch.setenv('STUB_FAIL', str(tmp_path / 'fail'))
+    monkeypatch.setattr(sra_downloader, 'SRATOOLKIT_PATH', str(tmp_path / 'sratoolkit'))
+    monkeypatch.setattr(sra_downloader, '_retry_delay', lambda attempt: 0)
+    sra_downloader._resolve_sra_toolkit.cache_clear()
+    
+    def conversions():
+        if not log_path.exists():
+            return []
+        return [line for line in log_path.read_text().splitlines() if line.startswith('fasterq-dump')]
+    
+    yield conversions
+    sra_downloader._resolve_sra_toolkit.cache_clear()
+
+
+@pytest.fixture
+def downloader(tmp_path, toolkit):
+    return SRADownloader(output_dir=str(tmp_path / 'out'), max_threads=2)
+
+
+def test_downloads_and_records_runs(downloader, toolkit):
+    assert downloader.download_sra_ids(['SRR1', 'SRR2']) == {'SRR1': True, 'SRR2': True}
+    
+    assert len(toolkit()) == 2
+    assert (downloader.output_dir / 'SRR1_2.fastq').exists()
+    assert not (downloader.output_dir / 'SRR1').exists()  # prefetch directory cleaned up
+    assert not downloader.temp_dir.exists()
+    assert set(downloader._load_manifest()) == {'SRR1', 'SRR2'}
+
+
+def test_completed_runs_are_skipped(downloader, toolkit):
+    downloader.download_sra_ids(['SRR1'])
+    
+    assert downloader.download_sra_ids(['SRR1']) == {'SRR1': True}
+    assert len(toolkit()) == 1
+    assert not downloader.temp_dir.exists()
+
+
+def test_changed_fastq_is_redownloaded_with_force(downloader, toolkit):
+    downloader.download_sra_ids(['SRR1'])
+    with open(downloader.output_dir / 'SRR1_1.fastq', 'a') as fastq:
+        fastq.write('truncated')
+    
+    assert downloader.download_sra_ids(['SRR1']) == {'SRR1': True}
+    assert len(toolkit()) == 2
+    assert '--force' in toolkit()[-1].split()
+
+
+def test_force_redownloads_completed_runs(downloader, toolkit):
+    downloader.download_sra_ids(['SRR1'])
+    
+    assert downloader.download_sra_ids(['SRR1'], force=True) == {'SRR1': True}
+    assert len(toolkit()) == 2
+    assert '--force' in toolkit()[-1].split()
+
+
+def test_failed_conversion_is_not_trusted(downloader, toolkit, tmp_path):
+    # The first conversion leaves SRR9_1.fastq behind and fails
+    (tmp_path / 'fail').touch()
+    assert downloader.download_sra_ids(['SRR9']) == {'SRR9': False}
+    assert (downloader.output_dir / 'SRR9_1.fastq').exists()
+    assert all('--force' in line.split() for line in toolkit())
+    
+    (tmp_path / 'fail').unlink()
+    conversions = len(toolkit())
+    assert downloader.download_sra_ids(['SRR9']) == {'SRR9': True}
+    assert len(toolkit()) == conversions + 1
+    assert 'SRR9' in downloader._load_manifest()
+
+
+def test_downloads_from_before_the_manifest_are_trusted(downloader, toolkit):
+    (downloader.output_dir / 'SRR5_1.fastq').write_text('@SRR5\n')
+    
+    assert downloader.download_sra_ids(['SRR5']) == {'SRR5': True}
+    assert toolkit() == []
+    assert 'SRR5' in downloader._load_manifest()